@@ -0,0 +1,330 @@
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_chatbot():
+    # "Medical chatbot.py" has a space in its name, so it is loaded by path
+    # to reuse its loading / indexing / preprocessing logic as-is.
+    path = os.path.join(HERE, "Medical chatbot.py")
+    spec = importlib.util.spec_from_file_location("medical_chatbot", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    return float(np.percentile(values, q))
+
+
+class BatchRetriever:
+    """Collects queries arriving within `window` seconds into one matrix multiply."""
+
+    def __init__(self, bot, pairs, window=0.002, max_batch=256, max_queue=4096):
+        self.bot = bot
+        self.pairs = pairs
+        self.tfidf, self.matrix = bot.build_index(pairs)
+        # TfidfVectorizer rows are L2-normalised, so q @ M.T is the cosine
+        # similarity computed by retrieve_answer().
+        self.matrix_t = self.matrix.T.tocsr()
+        self.window = window
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.started = time.time()
+        self.stats = {
+            "requests": 0,
+            "rejected": 0,
+            "batches": 0,
+            "batched_queries": 0,
+            "max_batch_seen": 0,
+        }
+        self.latencies = []
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self.executor.shutdown(wait=False)
+
+    def submit(self, query):
+        """Queue a query; returns a future, or None when the queue is full."""
+        fut = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((query, fut, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            return None
+        self.stats["requests"] += 1
+        return fut
+
+    def _score(self, queries):
+        q_vecs = self.tfidf.transform([self.bot.preprocess(q) for q in queries])
+        scores = (q_vecs @ self.matrix_t).toarray()
+        best = scores.argmax(axis=1)
+        return best, scores[np.arange(len(queries)), best]
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            queries = [q for q, _, _ in batch]
+            try:
+                best, scores = await loop.run_in_executor(self.executor, self._score, queries)
+            except Exception as e:
+                for _, fut, _ in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+
+            self.stats["batches"] += 1
+            self.stats["batched_queries"] += len(batch)
+            self.stats["max_batch_seen"] = max(self.stats["max_batch_seen"], len(batch))
+            now = time.perf_counter()
+            for (_, fut, t0), idx, score in zip(batch, best, scores):
+                self.latencies.append(now - t0)
+                if not fut.done():
+                    question, answer = self.pairs[idx]
+                    fut.set_result({"question": question, "answer": answer, "score": float(score)})
+            if len(self.latencies) > 10000:
+                del self.latencies[:-10000]
+
+    def snapshot(self):
+        s = dict(self.stats)
+        s["queue_depth"] = self.queue.qsize()
+        s["queue_limit"] = self.queue.maxsize
+        s["avg_batch_size"] = s["batched_queries"] / s["batches"] if s["batches"] else 0.0
+        s["uptime_s"] = round(time.time() - self.started, 1)
+        s["latency_ms"] = {
+            f"p{q}": round(percentile(self.latencies, q) * 1000, 3) for q in (50, 95, 99)
+        }
+        return s
+
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+MAX_BODY = 64 * 1024
+
+
+def http_response(status, payload, keep_alive=True, extra_headers=()):
+    body = json.dumps(payload).encode("utf-8")
+    headers = [
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        *extra_headers,
+    ]
+    return ("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def read_request(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    method, path, version = line.decode("latin-1").strip().split(" ", 2)
+    headers = {}
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b"\n", b""):
+            break
+        k, _, v = h.decode("latin-1").partition(":")
+        headers[k.strip().lower()] = v.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY:
+        return method, path, headers, None
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+
+class QueryServer:
+    def __init__(self, retriever):
+        self.retriever = retriever
+
+    async def handle(self, method, path, body):
+        if path == "/health":
+            return 200, {"status": "ok", "pairs": len(self.retriever.pairs)}, ()
+        if path == "/stats":
+            return 200, self.retriever.snapshot(), ()
+        if path != "/query":
+            return 404, {"error": "not found"}, ()
+        if method != "POST":
+            return 405, {"error": "use POST"}, ()
+        if body is None:
+            return 413, {"error": "request body too large"}, ()
+        try:
+            query = json.loads(body or b"{}").get("query", "")
+        except (ValueError, AttributeError):
+            return 400, {"error": "body must be JSON like {\"query\": \"...\"}"}, ()
+        if not isinstance(query, str) or not query.strip():
+            return 400, {"error": "'query' must be a non-empty string"}, ()
+
+        fut = self.retriever.submit(query)
+        if fut is None:
+            return 503, {"error": "server busy, retry later"}, ("Retry-After: 1",)
+        result = await fut
+        result["entities"] = self.retriever.bot.extract_entities(query)
+        return 200, result, ()
+
+    async def on_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    req = await read_request(reader)
+                except (ValueError, asyncio.IncompleteReadError):
+                    writer.write(http_response(400, {"error": "malformed request"}, keep_alive=False))
+                    break
+                if req is None:
+                    break
+                method, path, headers, body = req
+                keep_alive = headers.get("connection", "").lower() != "close" and body is not None
+                try:
+                    status, payload, extra = await self.handle(method, path.split("?", 1)[0], body)
+                except Exception as e:
+                    status, payload, extra = 500, {"error": str(e)}, ()
+                writer.write(http_response(status, payload, keep_alive, extra))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(args):
+    bot = load_chatbot()
+    pairs = bot.load_all_medquad_csvs(args.data)
+    if not pairs:
+        raise SystemExit(f"No Q&A pairs found in {args.data}/")
+    retriever = BatchRetriever(bot, pairs, window=args.window_ms / 1000,
+                               max_batch=args.max_batch, max_queue=args.max_queue)
+    retriever.start()
+    server = await asyncio.start_server(QueryServer(retriever).on_connection,
+                                        args.host, args.port, backlog=1024)
+    print(f"Serving {len(pairs)} Q&A pairs on http://{args.host}:{args.port} "
+          f"(window={args.window_ms}ms, max_batch={args.max_batch}, max_queue={args.max_queue})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await retriever.stop()
+
+
+BENCH_QUERIES = [
+    "What is polycystic ovary syndrome?",
+    "What causes diabetes?",
+    "How to treat asthma?",
+    "What are the symptoms of flu?",
+    "Is obesity inherited?",
+    "What is Noonan syndrome?",
+    "How is cancer diagnosed?",
+    "What are the treatments for high blood pressure?",
+]
+
+
+async def bench_worker(host, port, deadline, latencies, errors, counter):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            query = BENCH_QUERIES[counter[0] % len(BENCH_QUERIES)]
+            counter[0] += 1
+            body = json.dumps({"query": query}).encode("utf-8")
+            request = (f"POST /query HTTP/1.1\r\nHost: {host}\r\n"
+                       f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+                       ).encode("latin-1") + body
+            t0 = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                h = await reader.readline()
+                if h in (b"\r\n", b""):
+                    break
+                k, _, v = h.decode("latin-1").partition(":")
+                if k.strip().lower() == "content-length":
+                    length = int(v)
+            await reader.readexactly(length)
+            if status == 200:
+                latencies.append(time.perf_counter() - t0)
+            else:
+                errors[status] = errors.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def bench(args):
+    latencies, errors, counter = [], {}, [0]
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(
+        bench_worker(args.host, args.port, deadline, latencies, errors, counter)
+        for _ in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+    print(f"Requests: {len(latencies)} ok, {sum(errors.values())} failed {errors or ''}")
+    print(f"Elapsed:  {elapsed:.2f}s with {args.concurrency} connections")
+    print(f"QPS:      {len(latencies) / elapsed:.1f}")
+    for q in (50, 90, 99, 99.9):
+        print(f"p{q:<5}    {percentile(latencies, q) * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless HTTP/JSON server for the MedQuAD retriever.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_serve = sub.add_parser("serve", help="run the query server")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8080)
+    p_serve.add_argument("--data", default=os.path.join(HERE, "data"))
+    p_serve.add_argument("--window-ms", type=float, default=2.0,
+                         help="how long to wait for more queries before scoring a batch")
+    p_serve.add_argument("--max-batch", type=int, default=256)
+    p_serve.add_argument("--max-queue", type=int, default=4096,
+                         help="pending queries beyond this get HTTP 503")
+
+    p_bench = sub.add_parser("bench", help="load-test a running server")
+    p_bench.add_argument("--host", default="127.0.0.1")
+    p_bench.add_argument("--port", type=int, default=8080)
+    p_bench.add_argument("--concurrency", type=int, default=64)
+    p_bench.add_argument("--duration", type=float, default=10.0)
+
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args) if args.command == "serve" else bench(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()